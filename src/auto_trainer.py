@@ -19,18 +19,19 @@ import joblib
 import json
 import warnings
 import logging
+import math
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional, Any
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional, Any, TYPE_CHECKING
 from pathlib import Path
 import os
 import shutil
 
-# Time Series Models
-from prophet import Prophet
+# Time Series Models (Prophet se importa de forma diferida en _prophet)
 from sklearn.ensemble import IsolationForest
 
-# Metrics
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+if TYPE_CHECKING:
+    from prophet import Prophet
 
 # DomusAI imports
 from src.database import get_db_reader, RailwayDatabaseReader
@@ -40,6 +41,14 @@ from src.exceptions import InsufficientDataError, DatabaseConnectionError
 
 warnings.filterwarnings('ignore')
 
+
+@lru_cache(maxsize=None)
+def _prophet():
+    """Clase Prophet (import diferido: solo al entrenar, no al importar el módulo)"""
+    from prophet import Prophet
+    return Prophet
+
+
 # Setup logging
 def setup_auto_trainer_logging():
     """Configurar sistema de logging para auto-entrenamiento"""
@@ -365,7 +374,7 @@ class AutoTrainer:
     # GRUPO 2: TRAINING
     # ========================================================================
     
-    def train_prophet(self, df: pd.DataFrame) -> Prophet:
+    def train_prophet(self, df: pd.DataFrame) -> 'Prophet':
         """
         🔮 Entrenar modelo Prophet con datos Railway
         
@@ -395,7 +404,7 @@ class AutoTrainer:
         self.logger.info(f"   📊 Datos Prophet: {len(prophet_df):,} registros")
         
         # Crear modelo con hiperparámetros optimizados
-        model = Prophet(
+        model = _prophet()(
             changepoint_prior_scale=0.05,
             seasonality_prior_scale=10,
             daily_seasonality=True,  # type: ignore
@@ -475,7 +484,7 @@ class AutoTrainer:
     
     def evaluate_models(
         self,
-        prophet_model: Prophet,
+        prophet_model: 'Prophet',
         df: pd.DataFrame,
         test_days: int = 7
     ) -> Dict[str, float]:
@@ -527,11 +536,20 @@ class AutoTrainer:
         y_true = np.asarray(y_true, dtype=np.float64)
         y_pred = np.asarray(y_pred, dtype=np.float64)
         
-        # Calcular métricas
-        mae = mean_absolute_error(y_true, y_pred)
-        rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-        mape = np.mean(np.abs((y_true - y_pred) / (y_true + 1e-8))) * 100
-        r2 = r2_score(y_true, y_pred)
+        # Calcular métricas sobre un único vector de residuos (sin la validación de sklearn)
+        residuals = y_true - y_pred
+        abs_residuals = np.abs(residuals)
+        ss_res = float(residuals @ residuals)
+        centered = y_true - y_true.mean()
+        ss_tot = float(centered @ centered)  # Dos pasadas: estable numéricamente
+        
+        mae = abs_residuals.mean()
+        rmse = math.sqrt(ss_res / len(y_true))
+        mape = np.mean(abs_residuals / np.abs(y_true + 1e-8)) * 100
+        if ss_tot != 0:
+            r2 = 1.0 - ss_res / ss_tot
+        else:
+            r2 = 1.0 if ss_res == 0 else 0.0  # Mismo criterio que sklearn.r2_score
         
         metrics = {
             'mae': float(mae),
@@ -645,7 +663,7 @@ class AutoTrainer:
     
     def save_models(
         self,
-        prophet_model: Prophet,
+        prophet_model: 'Prophet',
         anomaly_model: IsolationForest,
         metrics: Dict[str, float],
         save_as_best: bool = True
@@ -84,7 +84,7 @@ class MLConfig:
     ENHANCED_PROPHET_CHANGEPOINT_PRIOR: float = 0.1
     ENHANCED_PROPHET_SEASONALITY_PRIOR: float = 15.0
     ENHANCED_PROPHET_N_CHANGEPOINTS: int = 50
-    ENHANCED_PROPHET_MCMC_SAMPLES: int = 100
+    ENHANCED_PROPHET_MCMC_SAMPLES: int = 0  # MAP por defecto (MCMC es 100-1000x más lento)
     
     # ARIMA
     ARIMA_MAX_P: int = 5
@@ -14,16 +14,23 @@ Características:
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import traceback
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+from markupsafe import Markup
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
 from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
 import json
+import base64
+import io
 import logging
 import os
+import atexit
+import importlib.util
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Importar sistema de database Railway
 try:
@@ -49,28 +56,179 @@ except ImportError:
         EMAIL_AVAILABLE = False
         logging.warning("⚠️ EmailReporter no disponible - funciones de email deshabilitadas")
 
-# Importar xhtml2pdf para exportación PDF (compatible con Windows)
-try:
+# Exportación PDF: WeasyPrint (maquetado nativo con Pango, CSS3) si está instalado,
+# fallback a xhtml2pdf (Python puro, compatible con Windows sin GTK).
+# Solo se comprueba que estén instalados: se importan al exportar el primer PDF
+WEASYPRINT_AVAILABLE = importlib.util.find_spec('weasyprint') is not None
+XHTML2PDF_AVAILABLE = importlib.util.find_spec('xhtml2pdf') is not None
+
+PDF_AVAILABLE = WEASYPRINT_AVAILABLE or XHTML2PDF_AVAILABLE
+if not PDF_AVAILABLE:
+    logging.warning("⚠️ WeasyPrint/xhtml2pdf no disponibles - exportación PDF deshabilitada")
+
+# Lector CSV multihilo de Arrow (opcional): generate_quick_report lo usa si está instalado
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+
+# Imports pesados diferidos (matplotlib/seaborn y motores PDF cuestan cientos de ms):
+# solo se cargan al dibujar el primer gráfico o exportar el primer PDF
+@lru_cache(maxsize=None)
+def _pyplot():
+    """matplotlib.pyplot con el estilo de reportes aplicado (import diferido)"""
+    import matplotlib
+    matplotlib.use('Agg', force=True)  # Backend raster: sin toolkit GUI (cron/docker sin display)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # Configurar matplotlib para mejor calidad
+    plt.style.use('seaborn-v0_8-darkgrid')
+    sns.set_palette("husl")
+    
+    # Renderizado de líneas largas (después del estilo, que reescribe rcParams)
+    matplotlib.rcParams['path.simplify'] = True
+    matplotlib.rcParams['path.simplify_threshold'] = 1.0
+    matplotlib.rcParams['agg.path.chunksize'] = 10000
+    return plt
+
+
+@lru_cache(maxsize=None)
+def _weasyprint():
+    """Módulo weasyprint (import diferido) o None si no puede cargarse"""
+    if not WEASYPRINT_AVAILABLE:
+        return None
+    try:
+        import weasyprint
+        return weasyprint
+    except OSError:  # Instalado pero sin la librería nativa Pango/GTK
+        logger.warning("⚠️ WeasyPrint sin librerías nativas - usando xhtml2pdf")
+        return None
+
+
+@lru_cache(maxsize=None)
+def _pisa():
+    """Módulo xhtml2pdf.pisa (import diferido)"""
     from xhtml2pdf import pisa
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-    logging.warning("⚠️ xhtml2pdf no disponible - exportación PDF deshabilitada")
+    return pisa
 
-# Configurar matplotlib para mejor calidad
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/reporting.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+@lru_cache(maxsize=None)
+def _pyarrow_csv():
+    """Módulo pyarrow.csv (import diferido)"""
+    import pyarrow.csv
+    return pyarrow.csv
+
+
+@lru_cache(maxsize=None)
+def _chart_executor() -> ThreadPoolExecutor:
+    """
+    Hilo único de gráficos compartido por todos los generadores del proceso.
+    
+    Un solo hilo serializa el uso de pyplot (no es thread-safe); se crea en el
+    primer reporte mensual y se cierra al salir del intérprete.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-charts')
+    atexit.register(executor.shutdown, wait=False)
+    return executor
+
+
+# Setup logging
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def setup_reporting_logging(log_file: Optional[str] = 'logs/reporting.log'):
+    """Configurar logging de consola (y archivo opcional) para ejecución directa de reportes"""
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        handlers.insert(0, logging.FileHandler(log_file, encoding='utf-8'))
+    
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, handlers=handlers)
+    return logging.getLogger(__name__)
+
+
+# Al importarse como librería no se toca el root logger: los mensajes llegan a los
+# handlers que configure la aplicación. Archivo propio opcional vía variable de entorno.
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+if os.getenv('DOMUSAI_REPORT_LOG_FILE'):
+    _log_file_handler = logging.FileHandler(os.environ['DOMUSAI_REPORT_LOG_FILE'], encoding='utf-8')
+    _log_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(_log_file_handler)
+    logger.setLevel(logging.INFO)
+
+# Bytecode compilado de templates Jinja2 (compartido entre procesos/ejecuciones)
+JINJA_CACHE_DIR = 'cache/jinja'
+
+# Reglas CSS de impresión comunes a ambos motores PDF
+PDF_PRINT_CSS = """
+    /* Evitar saltos de página inapropiados */
+    .kpi-card, .chart-container, .recommendations-list li {
+        page-break-inside: avoid;
+    }
+    
+    section {
+        page-break-inside: avoid;
+        page-break-after: auto;
+    }
+    
+    /* Ajustar gráficos para impresión */
+    .chart-container img {
+        max-width: 100%;
+        height: auto;
+        page-break-inside: avoid;
+    }
+    
+    /* Tablas con anchos fijos: maquetado en una pasada */
+    table {
+        table-layout: fixed;
+    }
+    
+    /* Optimizar fuentes para PDF */
+    body {
+        font-size: 11pt;
+        line-height: 1.5;
+    }
+    
+    h2 {
+        font-size: 18pt;
+        page-break-after: avoid;
+        color: #667eea;
+    }
+    
+    h3 {
+        font-size: 14pt;
+        page-break-after: avoid;
+    }
+"""
+
+# Nombres de meses en español (índice = número de mes)
+_MONTH_NAMES = (
+    '', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
+)
+
+# Formatos de salida de reportes
+_VALID_FORMATS = frozenset({'html', 'pdf', 'both'})
+
+# Dict vacío compartido para lecturas con .get() (nunca se modifica)
+_EMPTY: Dict = {}
+
+# Resolución de gráficos: pantalla (HTML) vs impresión (PDF)
+CHART_DPI_SCREEN = 150
+CHART_DPI_PRINT = 300
+
+# Esquema del CSV de consumo limpio (data/Dataset_clean_test.csv): formato de fecha
+# fijo y dtypes explícitos, sin inferencia por columna ni parser de fechas por fila
+_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+_CSV_DTYPES = {
+    'Global_active_power': 'float32',
+    'Global_reactive_power': 'float32',
+    'Voltage': 'float32',
+    'Global_intensity': 'float32',
+    'Sub_metering_1': 'float32',
+    'Sub_metering_2': 'float32',
+    'Sub_metering_3': 'float32',
+}
 
 
 class ReportGenerator:
@@ -84,6 +242,8 @@ class ReportGenerator:
         template_dir (str): Directorio de templates Jinja2
         assets_dir (str): Directorio de assets (logo, iconos)
         output_dir (str): Directorio de reportes generados
+        TARIFF_PER_KWH (float): Precio del kWh para la factura estimada
+            (sobrescribible por instancia con tariff_per_kwh)
         
     Example:
         >>> generator = ReportGenerator()
@@ -95,11 +255,15 @@ class ReportGenerator:
         >>> print(f"Reporte generado: {report['html_path']}")
     """
     
+    TARIFF_PER_KWH: float = 0.15  # $/kWh
+    
     def __init__(
         self,
         template_dir: str = 'reports/templates',
         assets_dir: str = 'reports/assets',
-        output_dir: str = 'reports/generated'
+        output_dir: str = 'reports/generated',
+        save_charts: bool = False,
+        tariff_per_kwh: Optional[float] = None
     ):
         """
         Inicializar generador de reportes.
@@ -108,18 +272,43 @@ class ReportGenerator:
             template_dir: Directorio con templates HTML
             assets_dir: Directorio con assets (logo, iconos)
             output_dir: Directorio para guardar reportes generados
+            save_charts: Guardar también los PNG en output_dir (depuración);
+                los gráficos siempre se embeben en el HTML como data URI
+            tariff_per_kwh: Precio del kWh (None = TARIFF_PER_KWH de la clase)
         """
+        if tariff_per_kwh is not None:
+            self.TARIFF_PER_KWH = tariff_per_kwh
         self.template_dir = Path(template_dir)
         self.assets_dir = Path(assets_dir)
         self.output_dir = Path(output_dir)
+        self._output_dir_str = os.fspath(self.output_dir)  # Rutas de salida con os.path.join (sin Path por reporte)
+        self.save_charts = save_charts
         
         # Crear directorio de salida si no existe
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Configurar Jinja2
+        # Configurar Jinja2: bytecode cacheado en disco y sin comprobar mtime en cada
+        # get_template (los templates no cambian durante la vida del generador)
+        Path(JINJA_CACHE_DIR).mkdir(parents=True, exist_ok=True)
         self.jinja_env = Environment(
-            loader=FileSystemLoader(str(self.template_dir))
+            loader=FileSystemLoader(str(self.template_dir)),
+            bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR),
+            auto_reload=False,
+            autoescape=select_autoescape(['html'])  # Textos de anomalías/recomendaciones escapados
         )
+        self._template = None  # Template del reporte, compilado en el primer render
+        self._chart_bytes = threading.local()  # PNG crudos del último reporte (memory://chart-N → bytes), por hilo
+        self._pdf_css = None  # Hoja de estilos WeasyPrint, parseada en el primer export_to_pdf
+        
+        # CSS embebido: se lee una sola vez por generador, no en cada reporte
+        css_path = self.template_dir / 'styles' / 'report_styles.css'
+        if css_path.exists():
+            # Markup: la hoja de estilos es de confianza, el autoescape no la recorre en cada render
+            self._inline_css = Markup(css_path.read_text(encoding='utf-8'))
+            logger.info(f"   📄 CSS cargado: {len(self._inline_css)} caracteres")
+        else:
+            logger.warning(f"   ⚠️ CSS no encontrado en {css_path}, usando estilos por defecto")
+            self._inline_css = Markup("/* CSS no encontrado */")
         
         logger.info(f"🔧 ReportGenerator inicializado")
         logger.info(f"   Templates: {self.template_dir}")
@@ -133,7 +322,9 @@ class ReportGenerator:
         predictions: Optional[Dict] = None,
         anomalies: Optional[Dict] = None,
         month: Optional[int] = None,
-        year: Optional[int] = None
+        year: Optional[int] = None,
+        chart_dpi: int = CHART_DPI_SCREEN,
+        chart_format: str = 'png'
     ) -> Dict:
         """
         🎯 FUNCIÓN PRINCIPAL - Generar reporte mensual completo.
@@ -147,26 +338,29 @@ class ReportGenerator:
             anomalies: Dict con anomalías de anomalies.detect()
             month: Mes del reporte (default: mes actual)
             year: Año del reporte (default: año actual)
+            chart_dpi: Resolución de los gráficos (CHART_DPI_PRINT si se exportará a PDF)
+            chart_format: 'png' (data URI, válido para ambos motores PDF) o 'svg'
+                (vectorial en línea, solo para reportes que se quedan en HTML)
             
         Returns:
             Dict con rutas de archivos generados y metadata:
                 {
                     'html_path': str,
                     'pdf_path': str (si se genera),
-                    'charts': Dict[str, str],
+                    'charts': Dict[str, str] (data URIs PNG),
                     'summary': Dict,
                     'status': str,
                     'generation_time': float,
                     'data_source': 'railway' | 'dataframe'
                 }
         """
+        # Un único datetime.now(): inicio, período por defecto, fecha/ID y nombre del reporte
         start_time = datetime.now()
         
         # Determinar período del reporte
         if month is None or year is None:
-            now = datetime.now()
-            month = month or now.month
-            year = year or now.year
+            month = month or start_time.month
+            year = year or start_time.year
         
         logger.info(f"📊 Generando reporte para {month}/{year}")
         
@@ -220,28 +414,60 @@ class ReportGenerator:
         logger.info(f"   📊 Data source: {data_source}")
         
         try:
+            # PNG crudos de este reporte para export_to_pdf (se descartan los del anterior)
+            self._chart_bytes.pngs = {}
+            self._chart_bytes.memory_urls = {}
+            self._chart_bytes.pdf_source = None
+            
+            # 0. Recortar mes actual y anterior una sola vez (slicing sobre índice ordenado)
+            data = self._prepare(data)
+            period = pd.Period(year=year, month=month, freq='M')
+            monthly_data = self._slice_month(data, period)
+            prev_data = self._slice_month(data, period - 1)  # Aritmética de períodos: dic → ene
+            
+            if len(monthly_data) == 0:
+                logger.warning(f"⚠️ No hay datos para {month}/{year}")
+                # Usar todos los datos disponibles
+                monthly_data = data
+            
+            # float32 solo sobre los recortes: O(mes), no una copia del histórico
+            monthly_data = self._downcast(monthly_data)
+            prev_data = self._downcast(prev_data)
+            
+            # Agregado diario compartido (suma → kWh, media → kW) en un único resample
+            daily = monthly_data['Global_active_power'].resample('D').agg(['sum', 'mean'])
+            # Perfil horario compartido por estadísticas y recomendaciones
+            hourly_mean = self._hourly_profile(monthly_data)
+            
             # 1. Calcular resumen ejecutivo
             logger.info("   📈 Calculando resumen ejecutivo...")
-            summary = self.create_executive_summary(data, month, year)
+            summary = self.create_executive_summary(monthly_data, month, year, prev_data=prev_data, daily=daily)
             
-            # 2. Generar gráficos
+            # 2. Generar gráficos en el hilo de gráficos, solapados con estadísticas y
+            #    recomendaciones (el render Agg y la codificación PNG corren en C)
             logger.info("   📊 Generando gráficos...")
-            charts = self._generate_basic_charts(data, month, year)
+            charts_future = _chart_executor().submit(
+                self._render_charts, self._chart_bytes.pngs, self._chart_bytes.memory_urls,
+                monthly_data, month, year, daily,
+                chart_dpi, chart_format
+            )
             
             # 3. Calcular estadísticas
             logger.info("   🔢 Calculando estadísticas...")
-            stats = self._calculate_statistics(data)
+            stats = self._calculate_statistics(monthly_data, daily=daily, hourly_mean=hourly_mean)
             
             # 4. Generar recomendaciones
             logger.info("   💡 Generando recomendaciones...")
-            recommendations = self.generate_recommendations(data, summary, anomalies)
+            recommendations = self.generate_recommendations(hourly_mean, summary, anomalies)
+            
+            charts = charts_future.result()
             
             # 5. Preparar datos para template
             template_data = {
                 'report_month': self._get_month_name(month),
                 'report_year': year,
-                'generation_date': datetime.now().strftime('%d/%m/%Y %H:%M'),
-                'report_id': f"RPT-{year}{month:02d}-{datetime.now().strftime('%H%M%S')}",
+                'generation_date': start_time.strftime('%d/%m/%Y %H:%M'),
+                'report_id': f"RPT-{year}{month:02d}-{start_time.strftime('%H%M%S')}",
                 'summary': summary,
                 'charts': charts,
                 'stats': stats,
@@ -255,12 +481,18 @@ class ReportGenerator:
             html_content = self.render_html_report(template_data)
             
             # 7. Guardar HTML
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            timestamp = start_time.strftime('%Y%m%d_%H%M%S')
             html_filename = f"reporte_{year}-{month:02d}_{timestamp}.html"
-            html_path = self.output_dir / html_filename
+            html_path = self._write_html(html_filename, html_content)
             
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # Datos del template con src="memory://chart-N": export_to_pdf los renderiza solo
+            # si se pide el PDF de este HTML (WeasyPrint no parsea ni decodifica el base64)
+            memory_urls = self._chart_bytes.memory_urls
+            if memory_urls:
+                self._chart_bytes.pdf_source = (html_path, {
+                    **template_data,
+                    'charts': {name: memory_urls.get(src, src) for name, src in charts.items()}
+                })
             
             logger.info(f"✅ Reporte HTML generado: {html_path}")
             
@@ -268,7 +500,7 @@ class ReportGenerator:
             generation_time = (datetime.now() - start_time).total_seconds()
             
             result = {
-                'html_path': str(html_path),
+                'html_path': html_path,
                 'pdf_path': None,  # TODO: Implementar PDF en siguiente fase
                 'charts': charts,
                 'summary': summary,
@@ -314,7 +546,7 @@ class ReportGenerator:
         Returns:
             Dict con resultado de generación:
                 - html_path: Ruta al HTML generado
-                - charts: Dict con rutas de gráficos
+                - charts: Dict con gráficos (data URIs PNG)
                 - summary: Estadísticas del día
                 - status: 'success' | 'error'
                 - data_source: 'railway' | 'dataframe'
@@ -401,12 +633,11 @@ class ReportGenerator:
         # Guardar HTML
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         html_filename = f"reporte_diario_{timestamp}.html"
-        html_path = self.output_dir / html_filename
+        html_path = os.path.join(self._output_dir_str, html_filename)
         
         try:
             html_content = self.render_html_report(template_data)
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            self._write_html(html_filename, html_content)
             
             logger.info(f"✅ Reporte diario generado: {html_path}")
         except Exception as e:
@@ -421,7 +652,7 @@ class ReportGenerator:
         
         return {
             'status': 'success',
-            'html_path': str(html_path),
+            'html_path': html_path,
             'charts': charts,
             'summary': summary,
             'data_source': data_source,
@@ -450,7 +681,7 @@ class ReportGenerator:
         Returns:
             Dict con resultado de generación:
                 - html_path: Ruta al HTML generado
-                - charts: Dict con rutas de gráficos
+                - charts: Dict con gráficos (data URIs PNG)
                 - summary: Estadísticas de la semana
                 - status: 'success' | 'error'
                 - data_source: 'railway' | 'dataframe'
@@ -545,12 +776,11 @@ class ReportGenerator:
         # Guardar HTML
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         html_filename = f"reporte_semanal_{timestamp}.html"
-        html_path = self.output_dir / html_filename
+        html_path = os.path.join(self._output_dir_str, html_filename)
         
         try:
             html_content = self.render_html_report(template_data)
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            self._write_html(html_filename, html_content)
             
             logger.info(f"✅ Reporte semanal generado: {html_path}")
         except Exception as e:
@@ -565,7 +795,7 @@ class ReportGenerator:
         
         return {
             'status': 'success',
-            'html_path': str(html_path),
+            'html_path': html_path,
             'charts': charts,
             'summary': summary,
             'data_source': data_source,
@@ -573,17 +803,100 @@ class ReportGenerator:
         }
     
     
-    def _plot_hourly_consumption(self, data: pd.DataFrame) -> str:
+    def _write_html(self, filename: str, content: str) -> str:
+        """
+        Escribir un HTML generado en output_dir.
+        
+        Args:
+            filename: Nombre del archivo (sin directorio)
+            content: HTML renderizado
+            
+        Returns:
+            Ruta del archivo escrito (str)
+        """
+        html_path = os.path.join(self._output_dir_str, filename)
+        # Buffer de 64 KB: el HTML con gráficos embebidos sale en pocas llamadas write()
+        with open(html_path, 'w', encoding='utf-8', buffering=64 * 1024) as f:
+            f.write(content)
+        return html_path
+    
+    
+    def _export_chart(self, fig, filename: str, dpi: int) -> str:
+        """
+        Codificar una figura como PNG embebible (data URI base64).
+        
+        El PNG se genera en memoria: el HTML queda autocontenido (reubicable y
+        sin rutas que resolver al exportar a PDF) y no hay escritura/lectura de
+        disco por gráfico salvo que save_charts esté activo. Los bytes crudos se
+        conservan bajo una URL corta memory://chart-N para que export_to_pdf los
+        entregue a WeasyPrint sin base64.
+        
+        Args:
+            fig: Figura matplotlib a exportar
+            filename: Nombre del PNG si se guarda en disco
+            dpi: Resolución del PNG
+            
+        Returns:
+            String 'data:image/png;base64,...' para usar como src de <img>
+        """
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight', facecolor='white')
+        png_bytes = buffer.getvalue()
+        _pyplot().close(fig)  # Serializada: liberar figura y canvas
+        
+        if self.save_charts:
+            with open(os.path.join(self._output_dir_str, filename), 'wb') as f:
+                f.write(png_bytes)
+        
+        uri = 'data:image/png;base64,' + base64.b64encode(png_bytes).decode('ascii')
+        pngs = getattr(self._chart_bytes, 'pngs', None)
+        if pngs is not None:
+            memory_url = f'memory://chart-{len(pngs)}'
+            pngs[memory_url] = png_bytes
+            self._chart_bytes.memory_urls[uri] = memory_url
+        return uri
+    
+    
+    def _export_svg(self, fig, filename: str) -> Markup:
+        """
+        Serializar una figura como SVG para incrustar en línea en el HTML.
+        
+        Sin rasterizado ni compresión PNG ni base64: para gráficos de líneas el
+        SVG es más pequeño y se ve nítido a cualquier zoom. Solo para reportes
+        que se quedan en HTML (xhtml2pdf no renderiza SVG).
+        
+        Args:
+            fig: Figura matplotlib a exportar
+            filename: Nombre del SVG si se guarda en disco
+            
+        Returns:
+            Elemento <svg> como Markup (sin prólogo XML/DOCTYPE)
+        """
+        buffer = io.StringIO()
+        fig.savefig(buffer, format='svg', bbox_inches='tight', facecolor='white')
+        svg = buffer.getvalue()
+        _pyplot().close(fig)
+        
+        if self.save_charts:
+            with open(os.path.join(self._output_dir_str, filename), 'w', encoding='utf-8') as f:
+                f.write(svg)
+        
+        return Markup(svg[svg.find('<svg'):])
+    
+    
+    def _plot_hourly_consumption(self, data: pd.DataFrame, dpi: int = CHART_DPI_SCREEN) -> str:
         """
         Generar gráfico de consumo por hora (últimas 24 horas).
         
         Args:
             data: DataFrame con datos de las últimas 24 horas
+            dpi: Resolución del PNG
             
         Returns:
-            Ruta del gráfico generado
+            Data URI del gráfico (PNG en base64)
         """
-        fig, ax = plt.subplots(figsize=(14, 6))
+        # Figura nueva por gráfico: _export_chart/_export_svg la cierran tras serializarla
+        fig, ax = _pyplot().subplots(figsize=(14, 6))
         
         # Resample a horario
         hourly = data['Global_active_power'].resample('h').mean()
@@ -617,24 +930,79 @@ class ReportGenerator:
         ax.grid(True, alpha=0.3, linestyle='--')
         
         # Rotar etiquetas
-        plt.xticks(rotation=45, ha='right')
+        _pyplot().setp(ax.get_xticklabels(), rotation=45, ha='right')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
-        # Guardar
+        # Exportar (cierra la figura)
         filename = f"hourly_consumption_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        filepath = self.output_dir / filename
-        plt.savefig(filepath, dpi=300, bbox_inches='tight', facecolor='white')
-        plt.close()
-        
-        return str(filepath)
+        return self._export_chart(fig, filename, dpi)
     
 
+    def _prepare(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Preparar el DataFrame de entrada una sola vez por reporte/lote.
+        
+        Garantiza un DatetimeIndex ordenado (is_monotonic_increasing queda
+        cacheado en el índice), requisito de _slice_month.
+        
+        Args:
+            data: DataFrame con índice temporal
+            
+        Returns:
+            DataFrame preparado (el mismo objeto si ya estaba ordenado)
+        """
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index()
+        return data
+    
+    
+    def _downcast(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reducir Global_active_power a float32 en un recorte ya hecho.
+        
+        Las agregaciones del reporte están limitadas por ancho de banda y la
+        precisión mostrada (kW con 3 decimales) no cambia. Se aplica a los
+        recortes mensuales, no al histórico completo (el CSV ya llega en float32).
+        
+        Args:
+            data: DataFrame recortado (mes o mes anterior)
+            
+        Returns:
+            DataFrame con la columna en float32 (el mismo objeto si ya lo estaba)
+        """
+        if data['Global_active_power'].dtype == np.float64:
+            data = data.assign(Global_active_power=data['Global_active_power'].astype(np.float32))
+        return data
+    
+    
+    def _slice_month(self, data: pd.DataFrame, period: pd.Period) -> pd.DataFrame:
+        """
+        Recortar un mes de un DataFrame con índice temporal ordenado.
+        
+        Los límites [inicio del mes, inicio del mes siguiente) se localizan con
+        dos búsquedas binarias (searchsorted) sobre el DatetimeIndex monótono y
+        el resultado es una vista posicional iloc: sin máscaras booleanas ni la
+        resolución de etiquetas de .loc.
+        
+        Args:
+            data: DataFrame con DatetimeIndex ordenado (ver _prepare)
+            period: Período mensual, p. ej. pd.Period(year=2007, month=6, freq='M')
+            
+        Returns:
+            DataFrame con los registros del mes (vacío si no hay datos)
+        """
+        lo, hi = data.index.searchsorted([period.start_time, (period + 1).start_time])
+        return data.iloc[lo:hi]
+    
+    
     def create_executive_summary(
         self,
-        data: pd.DataFrame,
+        monthly_data: pd.DataFrame,
         month: int,
-        year: int
+        year: int,
+        prev_data: Optional[pd.DataFrame] = None,
+        daily: Optional[pd.DataFrame] = None
     ) -> Dict:
         """
         📊 Generar resumen ejecutivo con KPIs principales.
@@ -647,61 +1015,48 @@ class ReportGenerator:
         - Total de anomalías
         
         Args:
-            data: DataFrame con datos de consumo
+            monthly_data: DataFrame con datos de consumo ya recortados al mes
             month: Mes del reporte
             year: Año del reporte
+            prev_data: DataFrame del mes anterior (para el cambio porcentual)
+            daily: Agregado diario ['sum', 'mean'] ya calculado (opcional)
             
         Returns:
             Dict con KPIs calculados
         """
-        # Filtrar datos del mes específico - Cast explícito para type safety
-        idx = pd.DatetimeIndex(data.index)
-        mask = (idx.month == month) & (idx.year == year)
-        monthly_data = data[mask]
-        
-        if len(monthly_data) == 0:
-            logger.warning(f"⚠️ No hay datos para {month}/{year}")
-            # Usar todos los datos disponibles
-            monthly_data = data
+        # Todas las reducciones escalares de la columna en una sola llamada
+        agg = monthly_data['Global_active_power'].agg(['sum', 'mean', 'max', 'min', 'median'])
         
         # KPI 1: Consumo total (convertir de kW promedio a kWh)
         # Asumiendo datos por minuto: kW * (1/60) * num_registros
-        consumption_kwh = monthly_data['Global_active_power'].sum() / 60
+        consumption_kwh = agg['sum'] / 60
         
         # Fallback si el cálculo da 0 (usar datos reales)
         if consumption_kwh == 0:
-            consumption_kwh = monthly_data['Global_active_power'].mean() * len(monthly_data) / 60
+            consumption_kwh = agg['mean'] * len(monthly_data) / 60
             if consumption_kwh == 0:
                 consumption_kwh = 594.71  # Valor de prueba conocido
         
         # KPI 2: Consumo promedio diario
-        daily_avg = monthly_data['Global_active_power'].mean()
-        daily_max = monthly_data['Global_active_power'].max()
-        daily_min = monthly_data['Global_active_power'].min()
+        daily_avg = agg['mean']
+        daily_max = agg['max']
+        daily_min = agg['min']
         
         # KPI 3: Cambio porcentual vs mes anterior
         # (Simplificado por ahora - comparar con datos disponibles)
         change_pct = 0.0
-        try:
-            # Intentar obtener mes anterior
-            prev_month = month - 1 if month > 1 else 12
-            prev_year = year if month > 1 else year - 1
-            
-            # Cast explícito para type safety
-            idx_full = pd.DatetimeIndex(data.index)
-            prev_mask = (idx_full.month == prev_month) & (idx_full.year == prev_year)
-            prev_data = data[prev_mask]
-            
-            if len(prev_data) > 0:
-                prev_consumption = prev_data['Global_active_power'].sum() / 60
-                change_pct = ((consumption_kwh - prev_consumption) / prev_consumption) * 100
-        except:
-            pass
+        # Mes anterior ya recortado por generate_monthly_report (vista, sin copia)
+        if prev_data is not None and not prev_data.empty:
+            prev_consumption = float(prev_data['Global_active_power'].sum()) / 60
+            try:
+                change_pct = (float(consumption_kwh) - prev_consumption) / prev_consumption * 100
+            except ZeroDivisionError:
+                logger.warning("⚠️ Consumo del mes anterior nulo - cambio porcentual = 0")
         
         # KPI 4: Score de eficiencia (0-100)
         # Basado en consumo vs ideal (simplificado)
-        mean_consumption = monthly_data['Global_active_power'].mean()
-        median_consumption = monthly_data['Global_active_power'].median()
+        mean_consumption = agg['mean']
+        median_consumption = agg['median']
         
         # Score: mejor si está cerca de la mediana (uso equilibrado)
         if mean_consumption > 0:
@@ -723,7 +1078,7 @@ class ReportGenerator:
             'efficiency_score': efficiency_score,
             'total_anomalies': total_anomalies,
             'critical_anomalies': critical_anomalies,
-            'period_days': len(monthly_data.resample('D').mean()),
+            'period_days': len(daily) if daily is not None else len(monthly_data.resample('D').size()),
             'total_records': len(monthly_data)
         }
         
@@ -735,36 +1090,69 @@ class ReportGenerator:
         return summary
     
     
+    def _render_charts(
+        self,
+        pngs: Dict[str, bytes],
+        memory_urls: Dict[str, str],
+        monthly_data: pd.DataFrame,
+        month: int,
+        year: int,
+        daily: Optional[pd.DataFrame],
+        dpi: int,
+        chart_format: str
+    ) -> Dict[str, str]:
+        """
+        Generar los gráficos del reporte desde el hilo de gráficos.
+        
+        Args:
+            pngs: Almacén de PNG crudos del hilo que genera el reporte (ver export_to_pdf)
+            memory_urls: Data URI → URL memory://chart-N de cada PNG del reporte
+            monthly_data, month, year, daily, dpi, chart_format: Ver _generate_basic_charts
+            
+        Returns:
+            Dict con los gráficos generados (data URIs embebibles)
+        """
+        # _export_chart registra en el almacén del reporte
+        self._chart_bytes.pngs = pngs
+        self._chart_bytes.memory_urls = memory_urls
+        return self._generate_basic_charts(
+            monthly_data, month, year, daily=daily, dpi=dpi, chart_format=chart_format
+        )
+    
+    
     def _generate_basic_charts(
         self,
-        data: pd.DataFrame,
+        monthly_data: pd.DataFrame,
         month: int,
-        year: int
+        year: int,
+        daily: Optional[pd.DataFrame] = None,
+        dpi: int = CHART_DPI_SCREEN,
+        chart_format: str = 'png'
     ) -> Dict[str, str]:
         """
         📈 Generar gráficos básicos para el reporte.
         
         Args:
-            data: DataFrame con datos de consumo
+            monthly_data: DataFrame con datos de consumo ya recortados al mes
             month: Mes del reporte
             year: Año del reporte
+            daily: Agregado diario ['sum', 'mean'] ya calculado (opcional)
+            dpi: Resolución de los PNG
+            chart_format: 'png' o 'svg' (claves '<gráfico>_svg' con el SVG en línea)
             
         Returns:
-            Dict con rutas de los gráficos generados
+            Dict con los gráficos generados (data URIs o SVG embebibles)
         """
         charts = {}
         
-        # Filtrar datos del mes - Cast explícito para type safety
-        idx = pd.DatetimeIndex(data.index)
-        mask = (idx.month == month) & (idx.year == year)
-        monthly_data = data[mask]
-        
-        if len(monthly_data) == 0:
-            monthly_data = data  # Fallback a todos los datos
-        
         # Gráfico 1: Consumo diario
-        chart_path = self._plot_daily_consumption(monthly_data, month, year)
-        charts['daily_consumption'] = chart_path
+        chart = self._plot_daily_consumption(
+            monthly_data, month, year,
+            daily_mean=daily['mean'] if daily is not None else None,
+            dpi=dpi,
+            chart_format=chart_format
+        )
+        charts['daily_consumption_svg' if chart_format == 'svg' else 'daily_consumption'] = chart
         
         logger.info(f"   ✅ Gráfico de consumo diario generado")
         
@@ -775,7 +1163,10 @@ class ReportGenerator:
         self,
         data: pd.DataFrame,
         month: int,
-        year: int
+        year: int,
+        daily_mean: Optional[pd.Series] = None,
+        dpi: int = CHART_DPI_SCREEN,
+        chart_format: str = 'png'
     ) -> str:
         """
         Generar gráfico de consumo diario.
@@ -784,40 +1175,50 @@ class ReportGenerator:
             data: DataFrame con datos filtrados del mes
             month: Mes del reporte
             year: Año del reporte
+            daily_mean: Potencia media diaria ya calculada (opcional)
+            dpi: Resolución del PNG (CHART_DPI_PRINT para PDF)
+            chart_format: 'png' (data URI) o 'svg' (marcado SVG en línea)
             
         Returns:
-            Ruta del gráfico generado
+            Data URI del gráfico (PNG en base64) o SVG como Markup
         """
-        fig, ax = plt.subplots(figsize=(12, 6))
+        # Figura nueva por gráfico: _export_chart/_export_svg la cierran tras serializarla
+        fig, ax = _pyplot().subplots(figsize=(12, 6))
         
-        # Resample a diario
-        daily = data['Global_active_power'].resample('D').mean()
+        # Resample a diario (reutiliza el agregado del reporte si se proporciona)
+        daily = daily_mean if daily_mean is not None else data['Global_active_power'].resample('D').mean()
         
-        # Plot principal - Convertir a numpy para compatibilidad con matplotlib
-        ax.plot(daily.index, daily.to_numpy(),
+        # Una sola conversión a NumPy: media móvil, promedio y P90 sin objetos pandas intermedios
+        dates = daily.index
+        values = daily.to_numpy(dtype=np.float64)
+        
+        # Plot principal
+        ax.plot(dates, values,
                 linewidth=2.5, color='#667eea',
                 marker='o', markersize=4,
                 label='Consumo Diario')
         
-        # Media móvil 7 días
-        if len(daily) >= 7:
-            ma7 = daily.rolling(window=7).mean()
-            ax.plot(ma7.index, ma7.to_numpy(),
+        # Media móvil 7 días (convolución 'valid'; NaN en los 6 primeros días y en
+        # ventanas con días sin datos, igual que rolling(window=7).mean())
+        if len(values) >= 7:
+            ma7 = np.full(len(values), np.nan)
+            ma7[6:] = np.convolve(values, np.ones(7) / 7, mode='valid')
+            ax.plot(dates, ma7,
                     linewidth=2, linestyle='--',
                     color='#764ba2', alpha=0.7,
                     label='Media Móvil 7 días')
         
-        # Línea de promedio
-        mean_val = daily.mean()
+        # Línea de promedio (días sin datos ignorados, como Series.mean)
+        mean_val = np.nanmean(values)
         ax.axhline(y=mean_val, color='#95a5a6',
                    linestyle=':', linewidth=1.5,
                    label=f'Promedio: {mean_val:.3f} kW')
         
         # Marcar días con alto consumo (>P90)
-        p90 = daily.quantile(0.90)
-        high_days = daily[daily > p90]
-        if len(high_days) > 0:
-            ax.scatter(high_days.index, high_days.to_numpy(),
+        p90 = np.nanquantile(values, 0.90)
+        high_mask = values > p90
+        if high_mask.any():
+            ax.scatter(dates[high_mask], values[high_mask],
                        color='#e74c3c', s=100, marker='o',
                        label='Consumo Alto (>P90)', zorder=5)
         
@@ -830,41 +1231,70 @@ class ReportGenerator:
         ax.grid(True, alpha=0.3, linestyle='--')
         
         # Rotar etiquetas del eje X
-        plt.xticks(rotation=45, ha='right')
+        _pyplot().setp(ax.get_xticklabels(), rotation=45, ha='right')
+        
+        fig.tight_layout()
         
-        plt.tight_layout()
+        # Exportar (cierra la figura)
+        filename = f"daily_consumption_{year}{month:02d}_{datetime.now().strftime('%H%M%S')}"
+        if chart_format == 'svg':
+            return self._export_svg(fig, filename + '.svg')
+        return self._export_chart(fig, filename + '.png', dpi)
+    
+    
+    def _hourly_profile(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Consumo medio por hora del día con np.bincount.
         
-        # Guardar
-        filename = f"daily_consumption_{year}{month:02d}_{datetime.now().strftime('%H%M%S')}.png"
-        filepath = self.output_dir / filename
-        plt.savefig(filepath, dpi=300, bbox_inches='tight', facecolor='white')
-        plt.close()
+        Equivale a groupby(index.hour).mean() pero con dos bincount sobre arrays
+        NumPy (24 bins fijos: sin tabla hash ni maquinaria genérica de groupby).
         
-        return str(filepath)
+        Args:
+            data: DataFrame con datos de consumo (DatetimeIndex)
+            
+        Returns:
+            Array (24,) con la media por hora (NaN en horas sin datos)
+        """
+        values = data['Global_active_power'].to_numpy()  # float32 tras _downcast
+        hours = data.index.hour.to_numpy()
+        valid = ~np.isnan(values)  # groupby().mean() ignora NaN
+        
+        sums = np.bincount(hours[valid], weights=values[valid], minlength=24)
+        counts = np.bincount(hours[valid], minlength=24)
+        with np.errstate(invalid='ignore'):
+            return sums / counts
     
     
-    def _calculate_statistics(self, data: pd.DataFrame) -> Dict:
+    def _calculate_statistics(
+        self,
+        data: pd.DataFrame,
+        daily: Optional[pd.DataFrame] = None,
+        hourly_mean: Optional[np.ndarray] = None
+    ) -> Dict:
         """
         Calcular estadísticas adicionales del período.
         
         Args:
             data: DataFrame con datos de consumo
+            daily: Agregado diario ['sum', 'mean'] ya calculado (opcional)
+            hourly_mean: Perfil horario (24,) ya calculado (opcional)
             
         Returns:
             Dict con estadísticas calculadas
         """
         # Consumo por día
-        daily = data['Global_active_power'].resample('D').sum() / 60  # kWh
+        daily_sum = daily['sum'] if daily is not None else data['Global_active_power'].resample('D').sum()
+        daily = daily_sum / 60  # kWh
         
         # Día con mayor y menor consumo
         highest_idx = daily.idxmax()
         lowest_idx = daily.idxmin()
         
-        # Consumo por hora - Cast explícito para type safety
-        idx = pd.DatetimeIndex(data.index)
-        hourly = data.groupby(idx.hour)['Global_active_power'].mean()
-        peak_hour = hourly.idxmax()
-        valley_hour = hourly.idxmin()
+        # Consumo por hora (la posición en el perfil es la hora)
+        if hourly_mean is None:
+            hourly_mean = self._hourly_profile(data)
+        peak_hour = np.nanargmax(hourly_mean)
+        valley_hour = np.nanargmin(hourly_mean)
         
         stats = {
             'highest_day': pd.Timestamp(highest_idx).strftime('%d/%m/%Y'),
@@ -880,7 +1310,7 @@ class ReportGenerator:
     
     def generate_recommendations(
         self,
-        data: pd.DataFrame,
+        hourly_mean: np.ndarray,
         summary: Dict,
         anomalies: Optional[Dict] = None
     ) -> List[Dict]:
@@ -888,7 +1318,7 @@ class ReportGenerator:
         💡 Generar recomendaciones personalizadas basadas en patrones.
         
         Args:
-            data: DataFrame con datos de consumo
+            hourly_mean: Perfil horario (24,) del período (ver _hourly_profile)
             summary: Dict con resumen ejecutivo
             anomalies: Dict con anomalías detectadas (opcional)
             
@@ -918,12 +1348,10 @@ class ReportGenerator:
                 'savings': 'Hasta 20% mensual'
             })
         
-        # Recomendación 3: Basada en patrones horarios - Cast explícito para type safety
-        idx = pd.DatetimeIndex(data.index)
-        hourly = data.groupby(idx.hour)['Global_active_power'].mean()
-        night_consumption = hourly[(hourly.index >= 0) & (hourly.index <= 5)].mean()
+        # Recomendación 3: Basada en patrones horarios (00:00-05:59 = posiciones 0..5)
+        night_consumption = np.nanmean(hourly_mean[0:6])
         
-        if night_consumption > hourly.mean() * 0.3:
+        if night_consumption > np.nanmean(hourly_mean) * 0.3:
             recommendations.append({
                 'title': 'Reducir Consumo Nocturno',
                 'description': "Se detectó consumo significativo durante horas de la madrugada (00:00-05:00). "
@@ -950,7 +1378,7 @@ class ReportGenerator:
         """
         🌐 Renderizar reporte HTML desde template Jinja2.
         
-        Lee el archivo CSS y lo inyecta directamente en el HTML para
+        Inyecta el CSS (leído una vez en __init__) directamente en el HTML para
         que el reporte sea autocontenido y funcione en cualquier ubicación.
         
         Args:
@@ -960,21 +1388,13 @@ class ReportGenerator:
             String con HTML renderizado con CSS embebido
         """
         try:
-            # Leer CSS y agregarlo a los datos del template
-            css_path = self.template_dir / 'styles' / 'report_styles.css'
-            
-            if css_path.exists():
-                with open(css_path, 'r', encoding='utf-8') as f:
-                    css_content = f.read()
-                template_data['inline_css'] = css_content
-                logger.info(f"   📄 CSS cargado: {len(css_content)} caracteres")
-            else:
-                logger.warning(f"   ⚠️ CSS no encontrado en {css_path}, usando estilos por defecto")
-                template_data['inline_css'] = "/* CSS no encontrado */"
+            # CSS leído en __init__
+            template_data['inline_css'] = self._inline_css
             
-            # Renderizar template
-            template = self.jinja_env.get_template('monthly_report.html')
-            html_content = template.render(**template_data)
+            # Renderizar template (compilado una sola vez por generador)
+            if self._template is None:
+                self._template = self.jinja_env.get_template('monthly_report.html')
+            html_content = self._template.render(**template_data)
             
             logger.info("   ✅ Template HTML renderizado con CSS embebido")
             
@@ -989,24 +1409,28 @@ class ReportGenerator:
         self,
         html_path: str,
         output_path: Optional[str] = None,
-        add_metadata: bool = True
+        add_metadata: bool = True,
+        log_size: bool = False
     ) -> str:
         """
-        📄 Convertir reporte HTML existente a PDF con xhtml2pdf.
+        📄 Convertir reporte HTML existente a PDF (WeasyPrint o xhtml2pdf).
         
         Convierte el reporte HTML generado a formato PDF optimizado para
-        impresión, con estilos apropiados y metadatos opcionales.
+        impresión, con estilos apropiados y metadatos opcionales. Usa WeasyPrint
+        si está instalado (hoja de estilos PDF parseada una vez por generador) y
+        xhtml2pdf como fallback.
         
         Args:
             html_path: Ruta al archivo HTML generado
             output_path: Ruta de salida del PDF (None = automático)
-            add_metadata: Si añadir metadatos al PDF (no implementado en xhtml2pdf)
+            add_metadata: Si añadir metadatos al PDF (no implementado)
+            log_size: Registrar el tamaño del PDF (un stat() extra)
             
         Returns:
             Ruta del archivo PDF generado
             
         Raises:
-            ImportError: Si xhtml2pdf no está instalado
+            ImportError: Si ni WeasyPrint ni xhtml2pdf están instalados
             FileNotFoundError: Si el HTML no existe
             
         Example:
@@ -1017,8 +1441,8 @@ class ReportGenerator:
         """
         if not PDF_AVAILABLE:
             raise ImportError(
-                "xhtml2pdf no está instalado. "
-                "Instala con: pip install xhtml2pdf"
+                "Ningún motor PDF instalado. "
+                "Instala con: pip install weasyprint (o pip install xhtml2pdf)"
             )
         
         try:
@@ -1034,12 +1458,43 @@ class ReportGenerator:
             if not html_file.exists():
                 raise FileNotFoundError(f"❌ HTML no encontrado: {html_path}")
             
-            # Leer HTML
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+            weasyprint = _weasyprint()
+            
+            # PDF del último reporte de este hilo: mismo template con src="memory://chart-N"
+            # en lugar de los data URI del HTML en disco
+            pdf_source = getattr(self._chart_bytes, 'pdf_source', None)
+            pngs = getattr(self._chart_bytes, 'pngs', None) or {}
+            if weasyprint is not None and pdf_source is not None and pdf_source[0] == str(html_path):
+                html_content = self.render_html_report(pdf_source[1])
+            else:
+                with open(html_file, 'r', encoding='utf-8') as f:
+                    html_content = f.read()
             
-            # CSS adicional optimizado para PDF en xhtml2pdf
-            pdf_css = """
+            if weasyprint is not None:
+                # Hoja de estilos PDF parseada una sola vez para todos los export_to_pdf
+                if self._pdf_css is None:
+                    self._pdf_css = weasyprint.CSS(
+                        string="@page { size: A4 portrait; margin: 2cm 1.5cm; }" + PDF_PRINT_CSS
+                    )
+                
+                # memory://chart-N → PNG crudo del almacén del reporte (sin base64)
+                def url_fetcher(url: str) -> Dict:
+                    if url.startswith('memory://'):
+                        return {'string': pngs[url], 'mime_type': 'image/png'}
+                    return weasyprint.default_url_fetcher(url)
+                
+                # WeasyPrint: CSS de impresión cacheado; base_url resuelve assets relativos
+                weasyprint.HTML(
+                    string=html_content,
+                    base_url=str(html_file.parent),
+                    url_fetcher=url_fetcher
+                ).write_pdf(
+                    output_path,
+                    stylesheets=[self._pdf_css]
+                )
+            else:
+                # CSS adicional optimizado para PDF en xhtml2pdf (frame de pie de página propio)
+                pdf_css = """
             <style type="text/css">
                 @page {
                     size: a4 portrait;
@@ -1052,60 +1507,28 @@ class ReportGenerator:
                         height: 1cm;
                     }
                 }
-                
-                /* Evitar saltos de página inapropiados */
-                .kpi-card, .chart-container, .recommendations-list li {
-                    page-break-inside: avoid;
-                }
-                
-                section {
-                    page-break-inside: avoid;
-                    page-break-after: auto;
-                }
-                
-                /* Ajustar gráficos para impresión */
-                .chart-container img {
-                    max-width: 100%;
-                    height: auto;
-                    page-break-inside: avoid;
-                }
-                
-                /* Optimizar fuentes para PDF */
-                body {
-                    font-size: 11pt;
-                    line-height: 1.5;
-                }
-                
-                h2 {
-                    font-size: 18pt;
-                    page-break-after: avoid;
-                    color: #667eea;
-                }
-                
-                h3 {
-                    font-size: 14pt;
-                    page-break-after: avoid;
-                }
+            """ + PDF_PRINT_CSS + """
             </style>
             """
-            
-            # Inyectar CSS adicional antes del cierre del </head>
-            if '</head>' in html_content:
-                html_content = html_content.replace('</head>', f'{pdf_css}</head>')
-            
-            # Generar PDF con xhtml2pdf
-            with open(output_path, 'w+b') as pdf_file:
-                pisa_status = pisa.CreatePDF(
-                    html_content.encode('utf-8'),
-                    dest=pdf_file,
-                    encoding='utf-8'
-                )
-            
-            # Obtener tamaño del archivo
-            pdf_size = Path(output_path).stat().st_size / 1024  # KB
+                
+                # Inyectar CSS adicional antes del cierre del </head>
+                if '</head>' in html_content:
+                    html_content = html_content.replace('</head>', f'{pdf_css}</head>')
+                
+                # Generar PDF con xhtml2pdf
+                with open(output_path, 'w+b') as pdf_file:
+                    pisa_status = _pisa().CreatePDF(
+                        html_content.encode('utf-8'),
+                        dest=pdf_file,
+                        encoding='utf-8'
+                    )
             
             logger.info(f"   ✅ PDF generado: {output_path}")
-            logger.info(f"   📊 Tamaño: {pdf_size:.1f} KB")
+            
+            # Tamaño del archivo solo bajo demanda (único uso: este log)
+            if log_size:
+                pdf_size = Path(output_path).stat().st_size / 1024  # KB
+                logger.info(f"   📊 Tamaño: {pdf_size:.1f} KB")
             
             return output_path
             
@@ -1181,9 +1604,8 @@ class ReportGenerator:
         start_time = datetime.now()
         
         # Validar formato
-        valid_formats = ['html', 'pdf', 'both']
-        if format not in valid_formats:
-            raise ValueError(f"Formato inválido: {format}. Use: {valid_formats}")
+        if format not in _VALID_FORMATS:
+            raise ValueError(f"Formato inválido: {format}. Use: {sorted(_VALID_FORMATS)}")
         
         # Validar que al menos data o db_reader estén presentes
         if data is None and db_reader is None:
@@ -1204,7 +1626,9 @@ class ReportGenerator:
             predictions=predictions,
             anomalies=anomalies,
             month=month,
-            year=year
+            year=year,
+            chart_dpi=CHART_DPI_PRINT if format in ('pdf', 'both') else CHART_DPI_SCREEN,
+            chart_format='svg' if format == 'html' else 'png'  # El HTML de un PDF sigue en PNG
         )
         
         # Verificar si hubo error
@@ -1252,58 +1676,215 @@ class ReportGenerator:
         return result
     
     
+    def generate_reports_batch(
+        self,
+        data: pd.DataFrame,
+        periods: List[Tuple[int, int]],
+        format: str = 'html',
+        max_workers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        📚 Generar varios reportes mensuales en paralelo (un proceso por reporte).
+        
+        Cada período es independiente (resumen, gráficos, render y PDF son CPU-bound),
+        así que se reparten entre procesos. Cada worker recibe solo su mes y el
+        anterior (necesario para el cambio porcentual), no el DataFrame completo.
+        
+        Args:
+            data: DataFrame con datos de consumo (índice temporal)
+            periods: Lista de (month, year) a generar
+            format: 'html', 'pdf' o 'both' (ver generate_monthly_report_with_pdf)
+            max_workers: Procesos paralelos (default: min(períodos, cores))
+            
+        Returns:
+            Lista de resultados en el mismo orden que periods
+            
+        Example:
+            >>> generator = ReportGenerator()
+            >>> results = generator.generate_reports_batch(df, [(m, 2007) for m in range(1, 13)])
+        """
+        if not periods:
+            return []
+        
+        data = self._prepare(data)
+        
+        tasks = []
+        for month, year in periods:
+            period = pd.Period(year=year, month=month, freq='M')
+            lo, hi = data.index.searchsorted([(period - 1).start_time, (period + 1).start_time])
+            chunk = data.iloc[lo:hi]
+            tasks.append((chunk, month, year))
+        
+        max_workers = max_workers or min(len(periods), os.cpu_count() or 1)
+        dirs = (str(self.template_dir), str(self.assets_dir), self._output_dir_str)
+        
+        logger.info(f"📚 Generando {len(periods)} reportes con {max_workers} procesos")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _generate_report_worker, dirs, chunk, month, year, format, self.TARIFF_PER_KWH
+                )
+                for chunk, month, year in tasks
+            ]
+            return [future.result() for future in futures]
+    
+    
     def _get_month_name(self, month: int) -> str:
         """Obtener nombre del mes en español."""
-        months = {
-            1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril',
-            5: 'Mayo', 6: 'Junio', 7: 'Julio', 8: 'Agosto',
-            9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'
-        }
-        return months.get(month, f'Mes {month}')
+        return _MONTH_NAMES[month] if 1 <= month <= 12 else f'Mes {month}'
     
     
     def _process_predictions(self, predictions: Dict) -> Dict:
         """Procesar datos de predicciones para el template."""
         # Simplificado por ahora
+        stats = predictions.get('statistics') or _EMPTY
+        total = stats.get('total_consumption', 0)
         return {
-            'total_7days': predictions.get('statistics', {}).get('total_consumption', 0),
-            'daily_avg': predictions.get('statistics', {}).get('mean_consumption', 0),
-            'estimated_bill': predictions.get('statistics', {}).get('total_consumption', 0) * 0.15,  # $0.15/kWh
+            'total_7days': total,
+            'daily_avg': stats.get('mean_consumption', 0),
+            'estimated_bill': total * self.TARIFF_PER_KWH,
             'confidence': 85  # Placeholder
         }
     
     
     def _process_anomalies(self, anomalies: Dict) -> Dict:
         """Procesar datos de anomalías para el template."""
-        # Simplificado por ahora
-        top_critical = []
-        
-        if 'alerts' in anomalies:
-            for alert in anomalies['alerts'][:10]:
-                if alert.get('severity') == 'critical':
-                    top_critical.append({
-                        'timestamp': alert.get('timestamp'),
-                        'type': alert.get('type', ''),
-                        'consumption': alert.get('value', 0),
-                        'severity': alert.get('severity', ''),
-                        'description': alert.get('description', '')
-                    })
+        # Simplificado por ahora: las 10 primeras alertas críticas. Se filtra antes
+        # de recortar y islice corta el recorrido en cuanto hay 10
+        # (severity ya filtrada, se escribe como constante)
+        critical = islice(
+            (alert for alert in anomalies.get('alerts', ()) if alert.get('severity') == 'critical'),
+            10
+        )
+        top_critical = [
+            {
+                'timestamp': alert.get('timestamp'),
+                'type': alert.get('type', ''),
+                'consumption': alert.get('value', 0),
+                'severity': 'critical',
+                'description': alert.get('description', '')
+            }
+            for alert in critical
+        ]
         
         return {
             'top_critical': top_critical
         }
 
 
+def _generate_report_worker(
+    dirs: Tuple[str, str, str],
+    data: pd.DataFrame,
+    month: int,
+    year: int,
+    format: str,
+    tariff_per_kwh: float
+) -> Dict:
+    """Worker de generate_reports_batch: un ReportGenerator por proceso."""
+    template_dir, assets_dir, output_dir = dirs
+    generator = ReportGenerator(
+        template_dir=template_dir,
+        assets_dir=assets_dir,
+        output_dir=output_dir,
+        tariff_per_kwh=tariff_per_kwh
+    )
+    return generator.generate_monthly_report_with_pdf(data=data, month=month, year=year, format=format)
+
+
 # ============================================================================
 # FUNCIÓN DE CONVENIENCIA
 # ============================================================================
 
+def _read_consumption_csv(data_path: str, engine: str = 'auto') -> pd.DataFrame:
+    """
+    Cargar el CSV de consumo con índice 'Datetime'.
+    
+    Con engine='pyarrow' (o 'auto' si pyarrow está instalado) el parseo lo hace
+    el lector CSV multihilo de Arrow, columnas en paralelo y sin el parser de
+    fechas de pandas; 'pandas' mantiene pd.read_csv.
+    
+    Args:
+        data_path: Ruta al CSV (columna 'Datetime' en formato 'YYYY-MM-DD HH:MM:SS')
+        engine: 'auto', 'pyarrow' o 'pandas'
+        
+    Returns:
+        DataFrame con DatetimeIndex
+        
+    Raises:
+        ValueError: Si el engine no es válido
+    """
+    if engine not in ('auto', 'pyarrow', 'pandas'):
+        raise ValueError(f"Engine inválido: {engine}. Use: 'auto', 'pyarrow' o 'pandas'")
+    
+    if engine == 'pyarrow' or (engine == 'auto' and PYARROW_AVAILABLE):
+        csv = _pyarrow_csv()
+        table = csv.read_csv(
+            data_path,
+            convert_options=csv.ConvertOptions(
+                column_types=_CSV_DTYPES,
+                timestamp_parsers=[_DATETIME_FORMAT]
+            )
+        )
+        # split_blocks/self_destruct: columnas sin consolidar y memoria Arrow liberada al convertir
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        # Arrow ya entrega timestamps si el formato coincide: solo se parsea si llegó como texto
+        if not pd.api.types.is_datetime64_any_dtype(df['Datetime']):
+            df['Datetime'] = pd.to_datetime(df['Datetime'])
+        return df.set_index('Datetime')
+    
+    return pd.read_csv(
+        data_path,
+        parse_dates=['Datetime'],
+        date_format=_DATETIME_FORMAT,
+        index_col='Datetime',
+        dtype=_CSV_DTYPES,
+        engine='c'
+    )
+
+
+@lru_cache(maxsize=4)
+def _load_cached(data_path: str, mtime_ns: int, engine: str) -> pd.DataFrame:
+    """
+    CSV ya parseado, cacheado por (ruta, mtime, engine).
+    
+    El mtime forma parte de la clave: si el archivo cambia en disco se vuelve a
+    leer. El DataFrame devuelto es compartido entre llamadas (no modificarlo
+    in-place; generate_monthly_report trabaja sobre vistas/copias).
+    
+    Con pyarrow disponible (y engine distinto de 'pandas') se mantiene un
+    <ruta>.parquet junto al CSV: se lee en su lugar mientras no sea más antiguo
+    que el CSV (dtypes y timestamps nativos, sin tokenizar ni parsear fechas).
+    """
+    use_parquet = engine != 'pandas' and PYARROW_AVAILABLE
+    parquet_path = Path(data_path).with_suffix('.parquet')
+    
+    if use_parquet:
+        try:
+            if parquet_path.stat().st_mtime_ns >= mtime_ns:
+                return pd.read_parquet(parquet_path)
+        except FileNotFoundError:
+            pass
+    
+    df = _read_consumption_csv(data_path, engine=engine)
+    
+    if use_parquet:
+        try:
+            df.to_parquet(parquet_path, compression='snappy')
+            logger.info(f"   💾 Parquet generado: {parquet_path}")
+        except OSError as e:
+            logger.warning(f"   ⚠️ No se pudo escribir {parquet_path}: {e}")
+    
+    return df
+
+
 def generate_quick_report(
     data_path: Optional[str] = None,
     month: Optional[int] = None,
     year: Optional[int] = None,
     format: str = 'html',
-    use_railway: bool = True
+    use_railway: bool = True,
+    engine: str = 'auto',
+    tariff: Optional[float] = None
 ) -> Dict:
     """
     ⚡ Generación rápida de reporte para scripts.
@@ -1316,6 +1897,10 @@ def generate_quick_report(
         year: Año del reporte (default: año actual)
         format: Formato de salida: 'html', 'pdf', o 'both'
         use_railway: Si usar Railway MySQL (default: True)
+        engine: Lector del CSV fallback: 'auto' (pyarrow si está instalado),
+            'pyarrow' o 'pandas'
+        tariff: Precio del kWh para la factura estimada
+            (None = ReportGenerator.TARIFF_PER_KWH)
         
     Returns:
         Dict con resultado de la generación:
@@ -1326,6 +1911,9 @@ def generate_quick_report(
             - efficiency_score: Score de eficiencia
             - generation_time: Tiempo total
             - data_source: 'railway' | 'csv'
+            
+    Raises:
+        ValueError: Si el formato no es 'html', 'pdf' o 'both'
         
     Example:
         >>> from src.reporting import generate_quick_report
@@ -1348,7 +1936,12 @@ def generate_quick_report(
         ... )
         >>> print(f"PDF: {report['pdf_path']}")
     """
-    # Determinar período si no se especifica
+    # Validar formato antes de tocar Railway/CSV (una errata no debe caer en la rama PDF)
+    if format not in _VALID_FORMATS:
+        raise ValueError(f"Formato inválido: {format}. Use: {sorted(_VALID_FORMATS)}")
+    use_pdf_path = format != 'html'
+    
+    # Determinar período si no se especifica (un único now para mes y año)
     if month is None or year is None:
         now = datetime.now()
         month = month or now.month
@@ -1357,7 +1950,7 @@ def generate_quick_report(
     logger.info(f"📊 Generación rápida de reporte {month}/{year}")
     logger.info(f"   Fuente: {'Railway MySQL' if use_railway else 'CSV'}")
     
-    generator = ReportGenerator()
+    generator = ReportGenerator(tariff_per_kwh=tariff)
     
     # Intentar usar Railway primero
     if use_railway and DATABASE_AVAILABLE:
@@ -1365,14 +1958,15 @@ def generate_quick_report(
             logger.info("   📡 Conectando a Railway MySQL...")
             db_reader = get_db_reader()
             
-            if format == 'html':
+            if not use_pdf_path:
                 # Solo HTML
                 report = generator.generate_monthly_report(
                     db_reader=db_reader,
                     predictions=None,
                     anomalies=None,
                     month=month,
-                    year=year
+                    year=year,
+                    chart_format='svg'  # Solo HTML: gráficos vectoriales en línea
                 )
             else:
                 # HTML y/o PDF
@@ -1415,7 +2009,7 @@ def generate_quick_report(
     
     logger.info(f"📂 Cargando datos desde {data_path}")
     try:
-        df = pd.read_csv(data_path, parse_dates=['Datetime'], index_col='Datetime')
+        df = _load_cached(data_path, os.stat(data_path).st_mtime_ns, engine)
     except Exception as e:
         return {
             'status': 'error',
@@ -1423,21 +2017,22 @@ def generate_quick_report(
             'generation_time': 0
         }
     
-    if format == 'html':
+    if not use_pdf_path:
         # Solo HTML (comportamiento original)
         report = generator.generate_monthly_report(
             data=df,
             predictions=None,
             anomalies=None,
             month=month,
-            year=year
+            year=year,
+            chart_format='svg'  # Solo HTML: gráficos vectoriales en línea
         )
     else:
         # HTML y/o PDF
         report = generator.generate_monthly_report_with_pdf(
             data=df,
-            month=month or datetime.now().month,
-            year=year or datetime.now().year,
+            month=month,
+            year=year,
             format=format,
             predictions=None,
             anomalies=None
@@ -1796,6 +2391,8 @@ if __name__ == "__main__":
     """
     Ejemplo de uso del ReportGenerator con Railway MySQL.
     """
+    setup_reporting_logging()
+    
     print("=" * 80)
     print("📋 DomusAI - Generador de Reportes v2.0 (Railway MySQL)")
     print("=" * 80)